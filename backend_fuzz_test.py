@@ -0,0 +1,421 @@
+#!/usr/bin/env python3
+"""
+Property-Based Fuzzing of Tag Validation & Query Params for Clash Intelligence Dashboard
+Generates thousands of tags/query values, checks status-code invariants concurrently
+and shrinks failures to minimal reproducers
+"""
+
+import json
+import random
+import re
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Dict, Any, List, Optional, Tuple
+from urllib.parse import quote, unquote, urlsplit
+
+import requests
+
+from backend_test import APITester, BASE_URL, TEST_CLAN_TAG
+
+# Configuration
+FUZZ_SEED = int(time.time())  # Printed at start; pin it here to replay a run
+FUZZ_CASES = 3000
+FUZZ_CONCURRENCY = 32
+REQUEST_TIMEOUT = 15
+MAX_SHRINK_REQUESTS = 150
+MAX_HISTORY_DAYS = 90
+
+# Mirrors CLASH_TAG_RE in web-next/src/lib/tags.ts
+COC_TAG_ALPHABET = "0289PYLQGRJCUV"
+CLASH_TAG_RE = re.compile(r"^#[0289PYLQGRJCUV]{5,}$", re.IGNORECASE)
+NON_COC_CHARS = "13457ABDEFHIKMNOSTWXZ!$&'()*+,;=@~-_."
+UNICODE_CHARS = ["ß", "İ", "ǅ", "Ⅸ", "０", "２", "Ｐ", "​", " ", "é", "😀", "#́", "ﬀ"]
+
+FUZZ_ROUTES = ['health', 'roster', 'history', 'comparison', 'insights']
+
+
+def normalize_tag(raw: str) -> str:
+    """Python port of normalizeTag() in web-next/src/lib/tags.ts"""
+    value = raw.strip().upper()
+    if not value:
+        return ''
+    no_hash = value.lstrip('#')
+    return f"#{no_hash}" if no_hash else ''
+
+
+def is_valid_tag(raw: str) -> bool:
+    """Python port of isValidTag() in web-next/src/lib/tags.ts"""
+    return bool(CLASH_TAG_RE.match(normalize_tag(raw)))
+
+
+class CaseGenerator:
+    """Seeded generators for tags, path segments and query values"""
+
+    def __init__(self, seed: int):
+        self.rng = random.Random(seed)
+
+    def valid_tag(self) -> str:
+        body = ''.join(self.rng.choice(COC_TAG_ALPHABET) for _ in range(self.rng.randint(5, 12)))
+        if self.rng.random() < 0.5:
+            body = body.lower()
+        return self.rng.choice(['', '#', '##']) + body
+
+    def tag(self) -> str:
+        """A logical tag value, in or outside the CoC alphabet"""
+        strategy = self.rng.randrange(9)
+        if strategy <= 2:
+            return self.valid_tag()
+        if strategy == 3:
+            # Too short
+            return '#' + ''.join(self.rng.choice(COC_TAG_ALPHABET) for _ in range(self.rng.randint(0, 4)))
+        if strategy == 4:
+            # One or more characters outside the alphabet
+            chars = list(self.valid_tag())
+            for _ in range(self.rng.randint(1, 3)):
+                chars.insert(self.rng.randint(0, len(chars)), self.rng.choice(NON_COC_CHARS))
+            return ''.join(chars)
+        if strategy == 5:
+            chars = list(self.valid_tag())
+            chars.insert(self.rng.randint(0, len(chars)), self.rng.choice(UNICODE_CHARS))
+            return ''.join(chars)
+        if strategy == 6:
+            return self.rng.choice([' ', '\t', '']) + self.valid_tag() + self.rng.choice([' ', '\n', ''])
+        if strategy == 7:
+            return self.valid_tag() * self.rng.randint(5, 60)
+        return self.rng.choice(['', '#', 'INVALID123', 'null', 'undefined', '%', '..', '0', '#2PR8R8V8P#'])
+
+    def path_segment(self) -> str:
+        """A raw (already URL-encoded) path segment for /api/player/[tag]/..."""
+        strategy = self.rng.randrange(8)
+        if strategy <= 4:
+            return quote(self.tag(), safe='')
+        if strategy == 5:
+            # Percent-encode every byte, including characters that would not need it
+            return ''.join(f"%{b:02X}" for b in self.tag().encode('utf-8'))
+        if strategy == 6:
+            return self.rng.choice(['%23', '%2F', '%2f', '%00', '%zz', '%E0%A4%A', '%252F', '%23%23']) + quote(self.valid_tag(), safe='')
+        return self.rng.choice(['', '/', '.', '..', '%2e%2e', quote(self.valid_tag(), safe='') + '/extra'])
+
+    def days(self) -> Optional[str]:
+        strategy = self.rng.randrange(6)
+        if strategy == 0:
+            return None
+        if strategy == 1:
+            return str(self.rng.randint(-100, 400))
+        if strategy == 2:
+            return str(self.rng.choice([-2 ** 63, -2 ** 31, -1, 0, 1, 89, 90, 91, 200, 365, 366, 2 ** 31, 2 ** 53 + 1, 10 ** 30]))
+        if strategy == 3:
+            return self.rng.choice(['', ' ', 'abc', '30abc', ' 45', '1.5', '1e3', '-0', '+7', '0x1F', 'NaN', 'Infinity', '３０', '٣٠'])
+        if strategy == 4:
+            return str(self.rng.uniform(-1000, 1000))
+        return str(self.rng.randint(1, 90)) + self.rng.choice(['', '&days=200', '%00', ';'])
+
+    def clan_tag(self) -> Optional[str]:
+        return None if self.rng.random() < 0.15 else self.tag()
+
+    def case(self) -> Dict[str, Any]:
+        route = self.rng.choice(FUZZ_ROUTES)
+        case = {'route': route}
+        if route in ('history', 'comparison'):
+            case['tag_segment'] = self.path_segment()
+        if route == 'history':
+            case['days'] = self.days()
+        if route in ('roster', 'insights', 'comparison', 'health'):
+            case['clanTag'] = self.clan_tag()
+        return case
+
+
+def build_path(case: Dict[str, Any]) -> str:
+    """Turn a case into a request path with an explicitly encoded query string"""
+    route = case['route']
+    if route == 'health':
+        path = "/api/health"
+    elif route == 'roster':
+        path = "/api/v2/roster"
+    elif route == 'insights':
+        path = "/api/insights"
+    else:
+        path = f"/api/player/{case['tag_segment']}/{route}"
+
+    params = [(k, case[k]) for k in ('days', 'clanTag') if case.get(k) is not None]
+    if params:
+        path += '?' + '&'.join(f"{k}={quote(v, safe='')}" for k, v in params)
+    return path
+
+
+def path_is_routable(segment: str) -> bool:
+    """Segments Next.js can match to [tag]: non-empty, no literal slash, not a dot segment"""
+    return bool(segment) and '/' not in segment and unquote(segment) not in ('.', '..')
+
+
+def is_normalizing_redirect(status: int, location: Optional[str]) -> bool:
+    """Next.js answers repeated slashes with a 308 to the collapsed path instead of routing them"""
+    if not 300 <= status < 400 or not location:
+        return False
+    path = urlsplit(location).path
+    return '//' not in path and not any(part in ('.', '..') for part in path.split('/'))
+
+
+def check_invariants(case: Dict[str, Any], status: int, body: Any, location: Optional[str] = None) -> Optional[str]:
+    """Return the name of the first violated invariant, or None if the response is acceptable"""
+    route = case['route']
+
+    if status >= 500:
+        return 'no_server_error'
+    if status in (200, 400) and route != 'health' and not isinstance(body, dict):
+        return 'json_body'
+    if status == 200 and isinstance(body, dict) and body.get('success') is False:
+        return 'success_flag_matches_status'
+
+    if route == 'health':
+        return None if status == 200 else 'health_always_200'
+
+    if route == 'insights':
+        if not case.get('clanTag'):
+            return None if status == 400 else 'insights_requires_clan_tag'
+        return None if status in (200, 404, 429) else 'insights_status'
+
+    if route == 'roster':
+        clan_tag = case.get('clanTag')
+        # The route falls back to cfg.homeClanTag for a missing or empty clanTag
+        if clan_tag and not is_valid_tag(clan_tag) and status == 200:
+            return 'roster_rejects_invalid_clan_tag'
+        return None if status in (200, 400, 403, 404) else 'roster_status'
+
+    # history / comparison
+    segment = case['tag_segment']
+    if not path_is_routable(segment):
+        if status in (400, 404) or is_normalizing_redirect(status, location):
+            return None
+        return 'unroutable_tag_400_or_404'
+    if not is_valid_tag(unquote(segment)):
+        return None if status == 400 else 'invalid_tag_400'
+    if status not in (200, 404):
+        return 'valid_tag_200_or_404'
+
+    if route == 'history' and status == 200:
+        days = (body.get('meta') or {}).get('days')
+        if not isinstance(days, int) or isinstance(days, bool):
+            return 'history_days_integer'
+        if not 1 <= days <= MAX_HISTORY_DAYS:
+            return 'history_days_capped'
+    return None
+
+
+def shrink_candidates(value: Optional[str]) -> List[Optional[str]]:
+    """Simpler versions of a value, simplest first"""
+    if value is None:
+        return []
+    candidates = [None, '']
+    if re.fullmatch(r"-?\d+", value):
+        # Move numbers toward zero so cap violations shrink to the boundary
+        n = int(value)
+        candidates += [str(n // 2), str(n * 3 // 4), str(n - 1 if n > 0 else n + 1)]
+    if len(value) > 1:
+        half = len(value) // 2
+        candidates += [value[:half], value[half:]]
+        candidates += [value[:i] + value[i + 1:] for i in range(min(len(value), 40))]
+    candidates += [
+        ''.join(c if c.isascii() else 'A' for c in value),
+        value.lower(),
+    ]
+    return [c for c in candidates if c != value]
+
+
+class FuzzTester(APITester):
+    def __init__(self, base_url: str, seed: int):
+        super().__init__(base_url)
+        self.seed = seed
+        self.generator = CaseGenerator(seed)
+        self._local = threading.local()
+        self.requests_sent = 0
+        self._count_lock = threading.Lock()
+
+    def thread_session(self) -> requests.Session:
+        """One session per worker thread (requests.Session is not thread-safe)"""
+        if not hasattr(self._local, 'session'):
+            session = requests.Session()
+            session.headers.update(self.session.headers)
+            self._local.session = session
+        return self._local.session
+
+    def execute(self, case: Dict[str, Any]) -> Tuple[Optional[str], int]:
+        """Send one case and return (violated invariant or None, status code)"""
+        with self._count_lock:
+            self.requests_sent += 1
+        try:
+            response = self.thread_session().get(
+                f"{self.base_url}{build_path(case)}",
+                timeout=REQUEST_TIMEOUT,
+                allow_redirects=False
+            )
+        except requests.RequestException as e:
+            return f"transport_error:{type(e).__name__}", 0
+
+        try:
+            body = response.json()
+        except ValueError:
+            body = None
+        violation = check_invariants(case, response.status_code, body, response.headers.get('Location'))
+        return violation, response.status_code
+
+    def shrink(self, case: Dict[str, Any], violation: str) -> Dict[str, Any]:
+        """Greedily simplify a failing case while it keeps violating the same invariant"""
+        best = dict(case)
+        budget = MAX_SHRINK_REQUESTS
+        improved = True
+        while improved and budget > 0:
+            improved = False
+            for field in ('tag_segment', 'days', 'clanTag'):
+                if field not in best:
+                    continue
+                for candidate_value in shrink_candidates(best[field]):
+                    if field == 'tag_segment' and candidate_value is None:
+                        continue
+                    if budget <= 0:
+                        break
+                    budget -= 1
+                    candidate = dict(best, **{field: candidate_value})
+                    if self.execute(candidate)[0] == violation:
+                        best = candidate
+                        improved = True
+                        break
+        return best
+
+    def test_fuzz_routes(self):
+        """Fire generated cases concurrently and verify status-code invariants"""
+        print(f"\n=== Fuzzing {len(FUZZ_ROUTES)} routes with {FUZZ_CASES} cases ({FUZZ_CONCURRENCY} workers) ===")
+
+        cases = [self.generator.case() for _ in range(FUZZ_CASES)]
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=FUZZ_CONCURRENCY) as pool:
+            outcomes = list(pool.map(self.execute, cases))
+        elapsed = time.perf_counter() - started
+
+        self.log_test(
+            "Fuzz Throughput",
+            True,
+            f"{len(cases)} cases in {elapsed:.1f}s ({len(cases) / elapsed * 60:,.0f} cases/min)",
+            {'cases': len(cases), 'seconds': round(elapsed, 2), 'seed': self.seed}
+        )
+
+        # Per-route pass counts
+        for route in FUZZ_ROUTES:
+            route_outcomes = [o for c, o in zip(cases, outcomes) if c['route'] == route]
+            failures = sum(1 for violation, _ in route_outcomes if violation)
+            statuses = {}
+            for _, status in route_outcomes:
+                statuses[status] = statuses.get(status, 0) + 1
+            self.log_test(
+                f"Fuzz {route}",
+                failures == 0,
+                f"{len(route_outcomes) - failures}/{len(route_outcomes)} cases satisfied invariants. Statuses: {statuses}",
+                {'statuses': statuses, 'failures': failures}
+            )
+
+        # Shrink one representative per (route, invariant) so reports stay readable
+        first_failures = {}
+        for case, (violation, status) in zip(cases, outcomes):
+            if violation and (case['route'], violation) not in first_failures:
+                first_failures[(case['route'], violation)] = (case, status)
+
+        for (route, violation), (case, status) in first_failures.items():
+            if violation.startswith('transport_error'):
+                minimal = case
+            else:
+                minimal = self.shrink(case, violation)
+            count = sum(1 for c, (v, _) in zip(cases, outcomes) if c['route'] == route and v == violation)
+            self.log_test(
+                f"Fuzz {route} - {violation}",
+                False,
+                f"{count} case(s). Minimal reproducer: GET {build_path(minimal)} (original: GET {build_path(case)}, HTTP {status})",
+                {'original': case, 'minimal': minimal, 'occurrences': count}
+            )
+
+    def run_all_tests(self):
+        """Run the fuzzing suite"""
+        print("🚀 Starting Property-Based Fuzzing")
+        print(f"Base URL: {self.base_url}")
+        print(f"Seed: {self.seed}")
+        print("=" * 60)
+
+        # Fixed sanity cases from the main suite first, so an outage isn't reported as thousands of fuzz failures
+        sanity = [
+            {'route': 'history', 'tag_segment': 'INVALID123', 'days': None},
+            {'route': 'history', 'tag_segment': '', 'days': None},
+            {'route': 'roster', 'clanTag': TEST_CLAN_TAG},
+        ]
+        for case in sanity:
+            violation, status = self.execute(case)
+            self.log_test(f"Fuzz Sanity GET {build_path(case)}", violation is None, f"HTTP {status}, violation: {violation}")
+            if violation and violation.startswith('transport_error'):
+                print("\n💥 Server unreachable - skipping fuzz run")
+                return self.summarize()
+
+        self.test_fuzz_routes()
+        return self.summarize()
+
+    def summarize(self):
+        """Print the summary block and return (passed, failed, results)"""
+        print("\n" + "=" * 60)
+        print("📊 FUZZ SUMMARY")
+        print("=" * 60)
+
+        total_tests = len(self.test_results)
+        passed_tests = sum(1 for result in self.test_results if result['success'])
+        failed_tests = total_tests - passed_tests
+
+        print(f"Requests Sent: {self.requests_sent}")
+        print(f"Total Checks: {total_tests}")
+        print(f"Passed: {passed_tests} ✅")
+        print(f"Failed: {failed_tests} ❌")
+        print(f"Replay with FUZZ_SEED = {self.seed}")
+
+        if failed_tests > 0:
+            print("\n❌ FAILED CHECKS:")
+            for result in self.test_results:
+                if not result['success']:
+                    print(f"  - {result['test']}: {result['details']}")
+
+        print("\n" + "=" * 60)
+        return passed_tests, failed_tests, self.test_results
+
+
+def main():
+    """Main fuzz execution"""
+    tester = FuzzTester(BASE_URL, FUZZ_SEED)
+
+    try:
+        passed, failed, results = tester.run_all_tests()
+
+        # Save detailed results
+        with open('/app/fuzz_test_results.json', 'w') as f:
+            json.dump({
+                'summary': {
+                    'seed': tester.seed,
+                    'requests_sent': tester.requests_sent,
+                    'total': len(results),
+                    'passed': passed,
+                    'failed': failed
+                },
+                'results': results,
+                'timestamp': datetime.now().isoformat()
+            }, f, indent=2)
+
+        print(f"\n📄 Detailed results saved to /app/fuzz_test_results.json")
+
+        sys.exit(0 if failed == 0 else 1)
+
+    except KeyboardInterrupt:
+        print("\n⚠️  Fuzzing interrupted by user")
+        sys.exit(1)
+    except Exception as e:
+        print(f"\n💥 Fuzz execution failed: {str(e)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
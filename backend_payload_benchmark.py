@@ -0,0 +1,296 @@
+#!/usr/bin/env python3
+"""
+Payload Size & Compression Benchmark for Clash Intelligence Dashboard
+Measures bytes on the wire for the roster and player history routes
+"""
+
+import gzip
+import json
+import statistics
+import sys
+import time
+import zlib
+from datetime import datetime
+from typing import Dict, Any, List, Optional
+
+from backend_test import APITester, BASE_URL, TEST_CLAN_TAG
+
+try:
+    import brotli
+except ImportError:  # brotli is optional - the br encoding is skipped without it
+    brotli = None
+
+# Configuration
+BENCHMARK_CLAN_TAGS = [TEST_CLAN_TAG]  # Add more tracked clans to compare clan sizes
+BENCHMARK_ITERATIONS = 5
+HISTORY_DAYS = 90
+HISTORY_SAMPLE_PLAYERS = 5
+ENCODINGS = ['identity', 'gzip', 'br']
+
+
+class PayloadBenchmark(APITester):
+    def __init__(self, base_url: str):
+        super().__init__(base_url)
+        self.benchmarks = []
+        self.roster_samples = {}
+
+    def decode_body(self, raw_body: bytes, content_encoding: str) -> bytes:
+        """Decode a raw response body according to its Content-Encoding header"""
+        if content_encoding == 'gzip':
+            return gzip.decompress(raw_body)
+        if content_encoding == 'deflate':
+            return zlib.decompress(raw_body)
+        if content_encoding == 'br':
+            if brotli is None:
+                raise RuntimeError("brotli module not installed")
+            return brotli.decompress(raw_body)
+        return raw_body
+
+    def fetch_wire_sample(self, path: str, encoding: str) -> Dict[str, Any]:
+        """Fetch a route once and measure wire size, raw size, latency and decode time"""
+        started = time.perf_counter()
+        response = self.session.get(
+            f"{self.base_url}{path}",
+            headers={'Accept-Encoding': encoding},
+            stream=True
+        )
+        # Read the undecoded body so we see exactly what crossed the wire
+        wire_body = response.raw.read(decode_content=False)
+        latency_ms = (time.perf_counter() - started) * 1000
+
+        content_encoding = response.headers.get('Content-Encoding', 'identity').lower()
+        decode_started = time.perf_counter()
+        raw_body = self.decode_body(wire_body, content_encoding)
+        decode_ms = (time.perf_counter() - decode_started) * 1000
+
+        return {
+            'status_code': response.status_code,
+            'content_encoding': content_encoding,
+            'wire_bytes': len(wire_body),
+            'raw_bytes': len(raw_body),
+            'latency_ms': latency_ms,
+            'decode_ms': decode_ms,
+            'body': raw_body
+        }
+
+    def benchmark_route(self, label: str, path: str) -> Optional[bytes]:
+        """Benchmark one route across every Accept-Encoding and log a summary per encoding"""
+        raw_body = None
+
+        for encoding in ENCODINGS:
+            if encoding == 'br' and brotli is None:
+                self.log_test(f"{label} [br]", True, "Skipped - install the brotli module to benchmark br")
+                continue
+
+            try:
+                samples = [self.fetch_wire_sample(path, encoding) for _ in range(BENCHMARK_ITERATIONS)]
+            except Exception as e:
+                self.log_test(f"{label} [{encoding}]", False, f"Request error: {str(e)}")
+                continue
+
+            failed = [s['status_code'] for s in samples if s['status_code'] != 200]
+            if failed:
+                self.log_test(f"{label} [{encoding}]", False, f"Non-200 responses: {failed}")
+                continue
+
+            raw_body = samples[-1]['body']
+            served_encoding = samples[-1]['content_encoding']
+            wire_bytes = samples[-1]['wire_bytes']
+            raw_bytes = samples[-1]['raw_bytes']
+            latencies = [s['latency_ms'] for s in samples]
+            decode_times = [s['decode_ms'] for s in samples]
+
+            result = {
+                'route': label,
+                'path': path,
+                'requested_encoding': encoding,
+                'served_encoding': served_encoding,
+                'wire_bytes': wire_bytes,
+                'raw_bytes': raw_bytes,
+                'compression_ratio': round(wire_bytes / raw_bytes, 4) if raw_bytes else None,
+                'latency_ms_median': round(statistics.median(latencies), 2),
+                'latency_ms_max': round(max(latencies), 2),
+                'decode_ms_median': round(statistics.median(decode_times), 3),
+                'iterations': BENCHMARK_ITERATIONS
+            }
+            self.benchmarks.append(result)
+
+            # Which encoding the server chose is a measurement, not a regression: Next's
+            # built-in compression only serves gzip, so br requests come back as gzip
+            result['encoding_honoured'] = encoding == 'identity' or served_encoding == encoding
+            note = '' if result['encoding_honoured'] else f" ⚠️ requested {encoding}"
+            self.log_test(
+                f"{label} [{encoding}]",
+                True,
+                f"{wire_bytes:,} B on wire / {raw_bytes:,} B raw (served as {served_encoding}{note}), "
+                f"median latency {result['latency_ms_median']} ms, decode {result['decode_ms_median']} ms",
+                {k: v for k, v in result.items() if k != 'path'}
+            )
+
+        return raw_body
+
+    def field_byte_contribution(self, members: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Attribute roster JSON bytes to each member field (key + value, raw and gzipped)"""
+        baseline = json.dumps(members, separators=(',', ':')).encode('utf-8')
+        baseline_gzip = len(gzip.compress(baseline))
+
+        field_names = sorted({key for member in members for key in member.keys()})
+        contributions = []
+        for field in field_names:
+            raw_bytes = sum(
+                len(json.dumps({field: member[field]}, separators=(',', ':')).encode('utf-8')) - 2
+                for member in members if field in member
+            )
+            # Removing the field shows what it actually costs once compressed
+            without_field = json.dumps(
+                [{k: v for k, v in member.items() if k != field} for member in members],
+                separators=(',', ':')
+            ).encode('utf-8')
+            gzip_saving = baseline_gzip - len(gzip.compress(without_field))
+
+            contributions.append({
+                'field': field,
+                'raw_bytes': raw_bytes,
+                'raw_share': round(raw_bytes / len(baseline), 4) if baseline else 0,
+                'gzip_bytes_saved_if_removed': gzip_saving
+            })
+
+        contributions.sort(key=lambda c: c['raw_bytes'], reverse=True)
+        return contributions
+
+    def test_roster_payload(self):
+        """Benchmark /api/v2/roster for each configured clan"""
+        print("\n=== Benchmarking V2 Roster Payload ===")
+
+        for clan_tag in BENCHMARK_CLAN_TAGS:
+            body = self.benchmark_route(f"Roster {clan_tag}", f"/api/v2/roster?clanTag={clan_tag}")
+            if not body:
+                continue
+
+            try:
+                data = json.loads(body)
+                members = data.get('data', {}).get('members', [])
+            except Exception as e:
+                self.log_test(f"Roster {clan_tag} Parse", False, f"Could not parse roster JSON: {str(e)}")
+                continue
+
+            self.roster_samples[clan_tag] = members
+            for result in self.benchmarks:
+                if result['route'] == f"Roster {clan_tag}":
+                    result['clan_size'] = len(members)
+
+            if not members:
+                self.log_test(f"Roster {clan_tag} Field Contribution", False, "Roster returned no members")
+                continue
+
+            contributions = self.field_byte_contribution(members)
+            top_fields = ', '.join(f"{c['field']} ({c['raw_share'] * 100:.1f}%)" for c in contributions[:5])
+            self.log_test(
+                f"Roster {clan_tag} Field Contribution",
+                True,
+                f"{len(members)} members, {len(contributions)} fields. Heaviest: {top_fields}",
+                contributions
+            )
+
+    def test_history_payload(self):
+        """Benchmark /api/player/[tag]/history for a sample of roster members"""
+        print("\n=== Benchmarking Player History Payload ===")
+
+        members = next((m for m in self.roster_samples.values() if m), [])
+        player_tags = [m['tag'].replace('#', '') for m in members if m.get('tag')][:HISTORY_SAMPLE_PLAYERS]
+        if not player_tags:
+            self.log_test("Player History Payload", False, "No player tags available (roster benchmark may have failed)")
+            return
+
+        for player_tag in player_tags:
+            body = self.benchmark_route(f"History {player_tag}", f"/api/player/{player_tag}/history?days={HISTORY_DAYS}")
+            if not body:
+                continue
+
+            try:
+                points = json.loads(body).get('data', [])
+            except Exception as e:
+                self.log_test(f"History {player_tag} Parse", False, f"Could not parse history JSON: {str(e)}")
+                continue
+
+            for result in self.benchmarks:
+                if result['route'] == f"History {player_tag}":
+                    result['data_points'] = len(points)
+                    result['bytes_per_point'] = round(result['raw_bytes'] / len(points), 1) if points else None
+
+    def run_all_tests(self):
+        """Run all benchmark suites"""
+        print("🚀 Starting Payload Size & Compression Benchmark")
+        print(f"Base URL: {self.base_url}")
+        print(f"Clan Tags: {', '.join(BENCHMARK_CLAN_TAGS)}")
+        print(f"Encodings: {', '.join(ENCODINGS)} (brotli available: {brotli is not None})")
+        print("=" * 60)
+
+        self.test_roster_payload()
+        self.test_history_payload()
+
+        # Summary
+        print("\n" + "=" * 60)
+        print("📊 BENCHMARK SUMMARY")
+        print("=" * 60)
+
+        print(f"{'Route':<28} {'Enc':<9} {'Wire B':>10} {'Raw B':>10} {'Ratio':>7} {'p50 ms':>8} {'Decode':>8}")
+        for result in self.benchmarks:
+            ratio = f"{result['compression_ratio']:.2f}" if result['compression_ratio'] is not None else '-'
+            print(
+                f"{result['route']:<28} {result['served_encoding']:<9} {result['wire_bytes']:>10,} "
+                f"{result['raw_bytes']:>10,} {ratio:>7} {result['latency_ms_median']:>8} {result['decode_ms_median']:>8}"
+            )
+
+        total_tests = len(self.test_results)
+        passed_tests = sum(1 for result in self.test_results if result['success'])
+        failed_tests = total_tests - passed_tests
+
+        print(f"\nTotal Checks: {total_tests}")
+        print(f"Passed: {passed_tests} ✅")
+        print(f"Failed: {failed_tests} ❌")
+
+        if failed_tests > 0:
+            print("\n❌ FAILED CHECKS:")
+            for result in self.test_results:
+                if not result['success']:
+                    print(f"  - {result['test']}: {result['details']}")
+
+        print("\n" + "=" * 60)
+        return passed_tests, failed_tests, self.test_results
+
+
+def main():
+    """Main benchmark execution"""
+    benchmark = PayloadBenchmark(BASE_URL)
+
+    try:
+        passed, failed, results = benchmark.run_all_tests()
+
+        # Save detailed results
+        with open('/app/payload_benchmark_results.json', 'w') as f:
+            json.dump({
+                'summary': {
+                    'total': len(results),
+                    'passed': passed,
+                    'failed': failed
+                },
+                'benchmarks': benchmark.benchmarks,
+                'results': results,
+                'timestamp': datetime.now().isoformat()
+            }, f, indent=2)
+
+        print(f"\n📄 Detailed results saved to /app/payload_benchmark_results.json")
+
+        sys.exit(0 if failed == 0 else 1)
+
+    except KeyboardInterrupt:
+        print("\n⚠️  Benchmark interrupted by user")
+        sys.exit(1)
+    except Exception as e:
+        print(f"\n💥 Benchmark execution failed: {str(e)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
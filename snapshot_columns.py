@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Columnar Snapshot Reader for Clash Intelligence Dashboard
+Memory-maps snapshots exported by `npm run export:columnar` for offline analytics
+"""
+
+import json
+import sys
+import time
+import warnings
+from pathlib import Path
+from typing import List
+
+import numpy as np
+
+# Configuration
+DEFAULT_COLUMNAR_ROOT = "out/columnar"  # Matches cfg.dataRoot ("../out") seen from web-next
+SUPPORTED_FORMAT_VERSION = 1
+
+
+class ColumnarSnapshot:
+    """One exported snapshot: manifest metadata plus lazily memory-mapped metric columns"""
+
+    def __init__(self, directory: Path):
+        self.directory = directory
+        with open(directory / 'manifest.json', 'r', encoding='utf-8') as f:
+            self.manifest = json.load(f)
+
+        version = self.manifest.get('formatVersion')
+        if version != SUPPORTED_FORMAT_VERSION:
+            raise ValueError(f"Unsupported columnar format version {version} in {directory}")
+
+        self.snapshot_date = self.manifest['snapshotDate']
+        self.member_count = self.manifest['memberCount']
+        self.tags = self.manifest['tags']
+        self.dtype = np.dtype(self.manifest.get('dtype', '<f8'))
+        self._columns = {}
+
+    def column(self, name: str) -> np.ndarray:
+        """Return a read-only memory-mapped view of one metric column"""
+        if name not in self.manifest['columns']:
+            raise KeyError(f"Column '{name}' not in snapshot {self.snapshot_date}")
+
+        if name not in self._columns:
+            if self.member_count == 0:
+                # np.memmap cannot map an empty file
+                self._columns[name] = np.empty(0, dtype=self.dtype)
+            else:
+                self._columns[name] = np.memmap(
+                    self.directory / f"{name}.f64",
+                    dtype=self.dtype,
+                    mode='r',
+                    shape=(self.member_count,)
+                )
+        return self._columns[name]
+
+
+class ColumnarSnapshotStore:
+    """All exported snapshots for a clan, queried together as date x player matrices"""
+
+    def __init__(self, root: str, clan_tag: str):
+        safe_tag = clan_tag.replace('#', '').lower()
+        clan_dir = Path(root) / safe_tag
+        manifests = sorted(clan_dir.glob('*/manifest.json')) if clan_dir.exists() else []
+
+        self.clan_tag = clan_tag
+        self.snapshots = [ColumnarSnapshot(path.parent) for path in manifests]
+        self.dates = [s.snapshot_date for s in self.snapshots]
+
+        # Stable player index across every snapshot (first-seen order)
+        self.tags = []
+        self._tag_index = {}
+        for snapshot in self.snapshots:
+            for tag in snapshot.tags:
+                if tag not in self._tag_index:
+                    self._tag_index[tag] = len(self.tags)
+                    self.tags.append(tag)
+
+        # Per-snapshot row -> player index, computed once so matrix() is a pure scatter
+        self._row_index = [
+            np.fromiter((self._tag_index[tag] for tag in s.tags), dtype=np.intp, count=s.member_count)
+            for s in self.snapshots
+        ]
+        self._matrices = {}
+
+    @property
+    def columns(self) -> List[str]:
+        """Metric columns present in every snapshot"""
+        if not self.snapshots:
+            return []
+        shared = set(self.snapshots[0].manifest['columns'])
+        for snapshot in self.snapshots[1:]:
+            shared &= set(snapshot.manifest['columns'])
+        return [c for c in self.snapshots[0].manifest['columns'] if c in shared]
+
+    def matrix(self, metric: str) -> np.ndarray:
+        """Return a (snapshots x players) float64 matrix; NaN where a player was absent or the value missing"""
+        if metric not in self._matrices:
+            result = np.full((len(self.snapshots), len(self.tags)), np.nan)
+            for i, snapshot in enumerate(self.snapshots):
+                # Snapshots exported before a metric was added keep an all-NaN row
+                if metric in snapshot.manifest['columns']:
+                    result[i, self._row_index[i]] = snapshot.column(metric)
+            self._matrices[metric] = result
+        return self._matrices[metric]
+
+    def player_series(self, metric: str, tag: str) -> np.ndarray:
+        """Return one player's metric across all snapshots"""
+        return self.matrix(metric)[:, self._tag_index[tag]]
+
+    def clan_totals(self, metric: str) -> np.ndarray:
+        """Sum a metric across members for every snapshot (e.g. donation trend)"""
+        return np.nansum(self.matrix(metric), axis=1)
+
+    def percentiles(self, metric: str, q: List[float]) -> np.ndarray:
+        """Return a (snapshots x len(q)) matrix of per-snapshot percentiles (e.g. trophy distribution)"""
+        values = self.matrix(metric)
+        if values.size == 0:
+            return np.full((len(self.snapshots), len(q)), np.nan)
+        with warnings.catch_warnings():
+            # Snapshots with no recorded values yield NaN rows rather than a warning
+            warnings.simplefilter('ignore', RuntimeWarning)
+            return np.nanpercentile(values, q, axis=1).T
+
+    def progression(self, metric: str) -> np.ndarray:
+        """Return each player's change between their first and last recorded value (e.g. hero progression)"""
+        values = self.matrix(metric)
+        if values.shape[0] == 0:
+            return np.full(values.shape[1], np.nan)
+        present = ~np.isnan(values)
+        has_any = present.any(axis=0)
+
+        first_row = present.argmax(axis=0)
+        last_row = values.shape[0] - 1 - present[::-1].argmax(axis=0)
+        columns = np.arange(values.shape[1])
+
+        delta = values[last_row, columns] - values[first_row, columns]
+        delta[~has_any] = np.nan
+        return delta
+
+
+def main():
+    """Summarise the stored snapshots and time a few cross-season queries"""
+    root = sys.argv[1] if len(sys.argv) > 1 else DEFAULT_COLUMNAR_ROOT
+    clan_tag = sys.argv[2] if len(sys.argv) > 2 else "#2PR8R8V8P"
+
+    store = ColumnarSnapshotStore(root, clan_tag)
+    print(f"📦 {len(store.snapshots)} snapshot(s), {len(store.tags)} player(s) for {clan_tag} under {root}")
+    if not store.snapshots:
+        print("Run `npm run export:columnar` in web-next first.")
+        sys.exit(1)
+
+    print(f"Range: {store.dates[0]} → {store.dates[-1]}")
+    print(f"Columns: {', '.join(store.columns)}")
+    print("=" * 60)
+
+    queries = {
+        'Donation totals per snapshot': lambda: store.clan_totals('donations'),
+        'Trophy p25/p50/p75 per snapshot': lambda: store.percentiles('trophies', [25, 50, 75]),
+        'BK level progression per player': lambda: store.progression('bk'),
+    }
+    for label, query in queries.items():
+        started = time.perf_counter()
+        result = query()
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        print(f"{label}: shape {result.shape} in {elapsed_ms:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
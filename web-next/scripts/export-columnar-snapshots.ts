@@ -0,0 +1,56 @@
+import 'dotenv/config';
+import path from 'path';
+import { cfg } from '@/lib/config';
+import { getAvailableSnapshotDates, loadFullSnapshot } from '@/lib/full-snapshot';
+import { writeColumnarSnapshot } from '@/lib/export/columnar-snapshot';
+import { normalizeTag } from '@/lib/tags';
+
+// Export stored full snapshots to the columnar format read by snapshot_columns.py
+//
+// Usage:
+//   npm run export:columnar -- --clan=#2PR8R8V8P --out=../out/columnar --since=2025-10-01
+
+function parseArgs() {
+  const args = new Map<string, string>();
+  process.argv.slice(2).forEach((arg) => {
+    const [key, value] = arg.split('=');
+    if (key && value) args.set(key.replace(/^--/, ''), value);
+  });
+  return args;
+}
+
+async function main() {
+  const args = parseArgs();
+  const clanTag = normalizeTag(args.get('clan') || cfg.homeClanTag || '');
+  if (!clanTag) {
+    console.error('❌ Provide --clan=#TAG (or set the home clan tag)');
+    process.exit(1);
+  }
+
+  const outRoot = path.resolve(args.get('out') || path.join(cfg.dataRoot, 'columnar'));
+  const since = args.get('since');
+
+  const dates = (await getAvailableSnapshotDates(clanTag))
+    .filter((date) => !since || date >= since)
+    .sort();
+  console.log(`Exporting ${dates.length} snapshot(s) for ${clanTag} to ${outRoot}`);
+
+  let exported = 0;
+  for (const date of dates) {
+    const snapshot = await loadFullSnapshot(clanTag, date);
+    if (!snapshot) {
+      console.warn(`⚠️  Snapshot ${date} could not be loaded, skipping`);
+      continue;
+    }
+    const dir = await writeColumnarSnapshot(snapshot, outRoot);
+    exported += 1;
+    console.log(`✅ ${date}: ${snapshot.memberSummaries?.length ?? 0} members → ${dir}`);
+  }
+
+  console.log(`Done. Exported ${exported}/${dates.length} snapshot(s).`);
+}
+
+main().catch((error) => {
+  console.error('❌ Columnar export failed:', error);
+  process.exit(1);
+});
@@ -0,0 +1,58 @@
+import { buildColumnarSnapshot, encodeColumn, MEMBER_METRIC_COLUMNS } from '../export/columnar-snapshot';
+import type { FullClanSnapshot } from '../full-snapshot';
+
+const baseSnapshot: FullClanSnapshot = {
+  clanTag: '#2pr8r8v8p',
+  fetchedAt: '2025-10-20T04:30:00.000Z',
+  clan: { name: 'Test Clan' },
+  memberSummaries: [
+    { tag: '#G9QVRYC2Y', name: 'warfroggy', role: 'leader', townHallLevel: 14, trophies: 486, donations: 72, leagueTier: { id: 105000014, name: 'Valkyrie League 14' } },
+    { tag: '#980GYGLRR', name: 'ethan', role: 'member', townHallLevel: 11 },
+  ],
+  playerDetails: {
+    '#G9QVRYC2Y': {
+      warStars: 900,
+      heroes: [
+        { name: 'Barbarian King', level: 80, village: 'home' },
+        { name: 'Battle Machine', level: 30, village: 'builderBase' },
+      ],
+    },
+  },
+  currentWar: null,
+  warLog: [],
+  capitalRaidSeasons: [],
+  metadata: { memberCount: 2, warLogEntries: 0, capitalSeasons: 0, version: '2025-09-15' },
+};
+
+describe('buildColumnarSnapshot', () => {
+  it('emits one column per metric with one row per member', () => {
+    const { manifest, columns } = buildColumnarSnapshot(baseSnapshot);
+
+    expect(manifest.clanTag).toBe('#2PR8R8V8P');
+    expect(manifest.snapshotDate).toBe('2025-10-20');
+    expect(manifest.tags).toEqual(['#G9QVRYC2Y', '#980GYGLRR']);
+    expect(manifest.columns).toEqual(Object.keys(MEMBER_METRIC_COLUMNS));
+    manifest.columns.forEach((name) => expect(columns[name]).toHaveLength(2));
+  });
+
+  it('merges summary and player detail values and marks missing values as NaN', () => {
+    const { columns } = buildColumnarSnapshot(baseSnapshot);
+
+    expect(columns.trophies[0]).toBe(486);
+    expect(columns.rankedLeagueId[0]).toBe(105000014);
+    expect(columns.warStars[0]).toBe(900);
+    expect(columns.bk[0]).toBe(80);
+    expect(columns.trophies[1]).toBeNaN();
+    expect(columns.bk[1]).toBeNaN();
+  });
+});
+
+describe('encodeColumn', () => {
+  it('writes little-endian float64 values', () => {
+    const buffer = encodeColumn(new Float64Array([1.5, NaN]));
+
+    expect(buffer).toHaveLength(16);
+    expect(buffer.readDoubleLE(0)).toBe(1.5);
+    expect(buffer.readDoubleLE(8)).toBeNaN();
+  });
+});
@@ -0,0 +1,137 @@
+/**
+ * Columnar Snapshot Export
+ * Writes a FullClanSnapshot as one raw float64 column per member metric so
+ * offline analytics (see snapshot_columns.py at the repo root) can memory-map
+ * many snapshots at once instead of reparsing the JSON.
+ *
+ * Layout: <root>/<safeTag>/<YYYY-MM-DD>/manifest.json + <metric>.f64
+ * Each .f64 file holds memberCount little-endian doubles; NaN marks a missing value.
+ */
+
+import { promises as fsp } from 'fs';
+import path from 'path';
+import type { FullClanSnapshot, MemberSummary } from '../full-snapshot';
+import { normalizeTag, safeTagForFilename } from '../tags';
+
+export const COLUMNAR_FORMAT_VERSION = 1;
+export const COLUMNAR_DTYPE = '<f8';
+
+type MetricExtractor = (summary: MemberSummary, detail: any) => number | null | undefined;
+
+const HERO_COLUMNS = {
+  bk: 'Barbarian King',
+  aq: 'Archer Queen',
+  gw: 'Grand Warden',
+  rc: 'Royal Champion',
+  mp: 'Minion Prince',
+} as const;
+
+function heroLevel(detail: any, heroName: string): number | null {
+  const heroes = Array.isArray(detail?.heroes) ? detail.heroes : [];
+  const hero = heroes.find((h: any) => h?.name === heroName && (h?.village ?? 'home') === 'home');
+  return typeof hero?.level === 'number' ? hero.level : null;
+}
+
+// Column order is the on-disk order; append new metrics at the end
+export const MEMBER_METRIC_COLUMNS: Record<string, MetricExtractor> = {
+  townHallLevel: (s, d) => s.townHallLevel ?? d?.townHallLevel,
+  builderHallLevel: (s, d) => s.builderHallLevel ?? d?.builderHallLevel,
+  trophies: (s, d) => s.trophies ?? d?.trophies,
+  bestTrophies: (_s, d) => d?.bestTrophies,
+  builderTrophies: (s, d) => s.builderTrophies ?? d?.builderBaseTrophies,
+  donations: (s, d) => s.donations ?? d?.donations,
+  donationsReceived: (s, d) => s.donationsReceived ?? d?.donationsReceived,
+  clanRank: (s) => s.clanRank,
+  rankedLeagueId: (s, d) => s.leagueTier?.id ?? d?.leagueTier?.id,
+  expLevel: (_s, d) => d?.expLevel,
+  warStars: (_s, d) => d?.warStars,
+  attackWins: (_s, d) => d?.attackWins,
+  clanCapitalContributions: (_s, d) => d?.clanCapitalContributions,
+  ...Object.fromEntries(
+    Object.entries(HERO_COLUMNS).map(([key, name]) => [key, (_s: MemberSummary, d: any) => heroLevel(d, name)])
+  ),
+};
+
+export interface ColumnarSnapshotManifest {
+  formatVersion: number;
+  dtype: string;
+  clanTag: string;
+  snapshotDate: string;
+  fetchedAt: string;
+  memberCount: number;
+  tags: string[];
+  names: string[];
+  roles: Array<string | null>;
+  columns: string[];
+}
+
+export interface ColumnarSnapshot {
+  manifest: ColumnarSnapshotManifest;
+  columns: Record<string, Float64Array>;
+}
+
+/**
+ * Convert a FullClanSnapshot into column arrays (one row per member summary)
+ */
+export function buildColumnarSnapshot(snapshot: FullClanSnapshot): ColumnarSnapshot {
+  const summaries = snapshot.memberSummaries ?? [];
+  const details = snapshot.playerDetails ?? {};
+  const columnNames = Object.keys(MEMBER_METRIC_COLUMNS);
+
+  const columns: Record<string, Float64Array> = {};
+  for (const name of columnNames) {
+    columns[name] = new Float64Array(summaries.length).fill(NaN);
+  }
+
+  summaries.forEach((summary, row) => {
+    const detail = details[normalizeTag(summary.tag)];
+    for (const name of columnNames) {
+      const value = MEMBER_METRIC_COLUMNS[name](summary, detail);
+      if (typeof value === 'number' && Number.isFinite(value)) {
+        columns[name][row] = value;
+      }
+    }
+  });
+
+  return {
+    manifest: {
+      formatVersion: COLUMNAR_FORMAT_VERSION,
+      dtype: COLUMNAR_DTYPE,
+      clanTag: normalizeTag(snapshot.clanTag),
+      snapshotDate: snapshot.metadata?.snapshotDate ?? snapshot.fetchedAt.slice(0, 10),
+      fetchedAt: snapshot.fetchedAt,
+      memberCount: summaries.length,
+      tags: summaries.map((s) => normalizeTag(s.tag)),
+      names: summaries.map((s) => s.name ?? ''),
+      roles: summaries.map((s) => s.role ?? null),
+      columns: columnNames,
+    },
+    columns,
+  };
+}
+
+/**
+ * Serialize a column as little-endian float64 regardless of host byte order
+ */
+export function encodeColumn(values: Float64Array): Buffer {
+  const buffer = Buffer.alloc(values.length * 8);
+  values.forEach((value, i) => buffer.writeDoubleLE(value, i * 8));
+  return buffer;
+}
+
+/**
+ * Write a snapshot in columnar form and return the directory it was written to
+ */
+export async function writeColumnarSnapshot(snapshot: FullClanSnapshot, outRoot: string): Promise<string> {
+  const { manifest, columns } = buildColumnarSnapshot(snapshot);
+  const dir = path.join(outRoot, safeTagForFilename(manifest.clanTag), manifest.snapshotDate);
+  await fsp.mkdir(dir, { recursive: true });
+
+  await Promise.all(
+    manifest.columns.map((name) => fsp.writeFile(path.join(dir, `${name}.f64`), encodeColumn(columns[name])))
+  );
+  // Manifest last so readers never see a manifest without its columns
+  await fsp.writeFile(path.join(dir, 'manifest.json'), JSON.stringify(manifest, null, 2), 'utf-8');
+
+  return dir;
+}
@@ -19,6 +19,7 @@ import { persistWarData } from './persist-war-data';
 export interface StagedIngestionResult {
   success: boolean;
   clanTag: string;
+  jobId?: string;
     phases: {
       fetch: PhaseResult;
       transform: PhaseResult;
@@ -81,6 +82,7 @@ export async function runStagedIngestion(options: StagedIngestionOptions = {}):
   const result: StagedIngestionResult = {
     success: false,
     clanTag,
+    jobId,
     phases: {
       fetch: { success: false, duration_ms: 0 },
       transform: { success: false, duration_ms: 0 },
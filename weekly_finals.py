@@ -0,0 +1,414 @@
+#!/usr/bin/env python3
+"""
+Incremental Weekly Ranked Finals Engine for Clash Intelligence Dashboard
+Streams player-day trophy rows and keeps per-player weekly maxima and finals
+without recomputing the whole history
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+from datetime import date, timedelta
+from typing import Dict, Any, Iterable, List, Optional, Tuple
+
+# Ranked battle weeks end Monday 5:00 AM UTC (RANKED_LEAGUE_SCHEDULE.md); the
+# 4:30 AM Monday snapshot is the week's final, so weeks are keyed by that Monday
+FINALS_WEEKDAY = 0  # Monday
+
+
+def ranked_week_key(day: str) -> str:
+    """Return the finals Monday (YYYY-MM-DD) of the ranked week a snapshot day belongs to"""
+    d = date.fromisoformat(day[:10])
+    return (d + timedelta(days=(FINALS_WEEKDAY - d.weekday()) % 7)).isoformat()
+
+
+def calendar_week_key(day: str) -> str:
+    """Port of getWeekKey() in analyze-weekly-finals.js: the Monday starting the calendar week"""
+    d = date.fromisoformat(day[:10])
+    return (d - timedelta(days=d.weekday())).isoformat()
+
+
+WEEK_KEY_MODES = {
+    'ranked': ranked_week_key,
+    'calendar': calendar_week_key,
+}
+
+
+class WeeklyFinalsEngine:
+    """Keeps one open week per player and finalizes it when a row from a later week arrives"""
+
+    def __init__(self, mode: str = 'ranked'):
+        if mode not in WEEK_KEY_MODES:
+            raise ValueError(f"Unknown week mode '{mode}' (expected one of {list(WEEK_KEY_MODES)})")
+        self.mode = mode
+        self.week_key = WEEK_KEY_MODES[mode]
+        self.open_weeks = {}   # player_tag -> running state for the player's current week
+        self.finals = {}       # week_key -> {player_tag: closed week entry}
+        self.names = {}        # player_tag -> latest known name
+        self.last_day = None
+
+    def ingest_row(self, row: Dict[str, Any]):
+        """Apply one player-day row; rows must be chronological per player"""
+        tag = row['player_tag']
+        day = (row.get('snapshot_day') or row.get('date'))[:10]
+        trophies = row.get('trophies')
+        trophies = int(trophies) if trophies is not None else 0
+        week = self.week_key(day)
+
+        if row.get('player_name'):
+            self.names[tag] = row['player_name']
+        if self.last_day is None or day > self.last_day:
+            self.last_day = day
+
+        state = self.open_weeks.get(tag)
+        if state is not None and day < state['last_day']:
+            raise ValueError(f"Out-of-order row for {tag}: {day} after {state['last_day']}")
+
+        if state is None or state['week'] != week:
+            if state is not None:
+                self._close(tag, state)
+            state = {
+                'week': week,
+                'max_trophies': trophies,
+                'max_day': day,
+                'final_trophies': trophies,
+                'final_day': day,
+                'last_day': day,
+                'days': 0,
+            }
+            self.open_weeks[tag] = state
+
+        if trophies > state['max_trophies']:
+            state['max_trophies'] = trophies
+            state['max_day'] = day
+        # Rows taken after the Monday 5:00 AM reset still key into the ending week but
+        # read 0, so a zero never replaces the week's last positive (pre-reset) value
+        if trophies > 0 or state['final_trophies'] <= 0:
+            state['final_trophies'] = trophies
+            state['final_day'] = day
+        state['last_day'] = day
+        state['days'] += 1
+
+    def ingest(self, rows: Iterable[Dict[str, Any]]):
+        """Apply a stream of rows (e.g. one new day of player_day data)"""
+        for row in rows:
+            self.ingest_row(row)
+
+    def _close(self, tag: str, state: Dict[str, Any]):
+        """Move a player's finished week into the finals table"""
+        self.finals.setdefault(state['week'], {})[tag] = {k: v for k, v in state.items() if k != 'week'}
+
+    def weeks(self) -> List[str]:
+        """All week keys seen so far, including weeks still open"""
+        keys = set(self.finals)
+        keys.update(state['week'] for state in self.open_weeks.values())
+        return sorted(keys)
+
+    def week_entries(self, week: str) -> Dict[str, Dict[str, Any]]:
+        """Closed and still-open entries for one week"""
+        entries = dict(self.finals.get(week, {}))
+        for tag, state in self.open_weeks.items():
+            if state['week'] == week:
+                entries[tag] = {k: v for k, v in state.items() if k != 'week'}
+        return entries
+
+    def is_complete(self, week: str) -> bool:
+        """A week is complete once data past its finals day has been ingested"""
+        if self.mode != 'ranked':
+            return self.last_day is not None and self.last_day > (date.fromisoformat(week) + timedelta(days=6)).isoformat()
+        return self.last_day is not None and self.last_day > week
+
+    def leaderboard(self, week: str) -> List[Dict[str, Any]]:
+        """Rank players for one week by their best trophies (ties broken by final trophies)"""
+        entries = self.week_entries(week)
+        ranked = sorted(
+            entries.items(),
+            key=lambda item: (-item[1]['max_trophies'], -item[1]['final_trophies'], self.names.get(item[0], item[0]).lower())
+        )
+        return [
+            {
+                'rank': i + 1,
+                'player_tag': tag,
+                'player_name': self.names.get(tag),
+                **entry
+            }
+            for i, (tag, entry) in enumerate(ranked)
+        ]
+
+    def positive_maxima(self) -> Dict[str, Dict[str, int]]:
+        """{player_tag: {week: max}} for weeks with trophies > 0 - the shape the JS backfill builds"""
+        result = {}
+        for week in self.weeks():
+            for tag, entry in self.week_entries(week).items():
+                if entry['max_trophies'] > 0:
+                    result.setdefault(tag, {})[week] = entry['max_trophies']
+        return result
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Serialize engine state so the next run only ingests new days"""
+        return {
+            'mode': self.mode,
+            'open_weeks': self.open_weeks,
+            'finals': self.finals,
+            'names': self.names,
+            'last_day': self.last_day,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'WeeklyFinalsEngine':
+        engine = cls(data.get('mode', 'ranked'))
+        engine.open_weeks = data.get('open_weeks', {})
+        engine.finals = data.get('finals', {})
+        engine.names = data.get('names', {})
+        engine.last_day = data.get('last_day')
+        return engine
+
+
+# Same getWeekKey() and weekly-max loop as web-next/analyze-weekly-finals.js, applied to every player
+JS_REFERENCE = r"""
+const rows = JSON.parse(require('fs').readFileSync(process.argv[1], 'utf-8'));
+function getWeekKey(dateString) {
+  const base = new Date(dateString + 'T00:00:00Z');
+  const day = base.getUTCDay();
+  const diff = base.getUTCDate() - day + (day === 0 ? -6 : 1);
+  base.setUTCDate(diff);
+  base.setUTCHours(0, 0, 0, 0);
+  return base.toISOString().slice(0, 10);
+}
+const weeklyByMember = new Map();
+for (const row of rows) {
+  const weekKey = getWeekKey(String(row.snapshot_day ?? row.date).slice(0, 10));
+  const ranked = Number(row.trophies ?? 0);
+  if (!Number.isFinite(ranked) || ranked <= 0) continue;
+  if (!weeklyByMember.has(row.player_tag)) weeklyByMember.set(row.player_tag, new Map());
+  const weekMap = weeklyByMember.get(row.player_tag);
+  const current = weekMap.get(weekKey) ?? 0;
+  if (ranked > current) weekMap.set(weekKey, ranked);
+}
+const out = {};
+for (const [tag, weekMap] of weeklyByMember) out[tag] = Object.fromEntries(weekMap);
+console.log(JSON.stringify(out));
+"""
+
+
+def run_js_reference(rows_path: str) -> Dict[str, Dict[str, int]]:
+    """Run the JS weekly-max logic under node and return {player_tag: {week: max}}"""
+    result = subprocess.run(
+        ['node', '-e', JS_REFERENCE, rows_path],
+        capture_output=True, text=True, check=True
+    )
+    return json.loads(result.stdout)
+
+
+def validate_against_js(rows_path: str, rows: List[Dict[str, Any]]) -> bool:
+    """Compare calendar-mode engine output with the JS reference; print any mismatches"""
+    engine = WeeklyFinalsEngine('calendar')
+    engine.ingest(sorted(rows, key=lambda r: (r.get('snapshot_day') or r.get('date'))[:10]))
+    expected = run_js_reference(rows_path)
+    actual = engine.positive_maxima()
+
+    mismatches = []
+    for tag in sorted(set(expected) | set(actual)):
+        if expected.get(tag, {}) != actual.get(tag, {}):
+            mismatches.append((tag, expected.get(tag, {}), actual.get(tag, {})))
+
+    if mismatches:
+        print(f"❌ {len(mismatches)} player(s) differ from the JS reference:")
+        for tag, js_weeks, py_weeks in mismatches:
+            print(f"  - {tag}: JS {js_weeks} vs engine {py_weeks}")
+        return False
+
+    print(f"✅ Engine matches JS weekly maxima for {len(expected)} player(s) across {len(engine.weeks())} week(s)")
+    return True
+
+
+def _row(tag: str, day: str, trophies: int) -> Dict[str, Any]:
+    return {'player_tag': tag, 'player_name': tag.strip('#'), 'snapshot_day': day, 'trophies': trophies}
+
+
+# 2025-10-13 is a finals Monday; the 10-13 rows below are post-reset snapshots reading 0
+SELF_TEST_ROWS = [
+    _row('#A', '2025-10-10', 5000), _row('#B', '2025-10-11', 5000),
+    _row('#A', '2025-10-12', 4950), _row('#B', '2025-10-12', 4900),
+    _row('#A', '2025-10-13', 0), _row('#B', '2025-10-13', 0),
+    _row('#A', '2025-10-14', 4100), _row('#B', '2025-10-15', 4200),
+    _row('#A', '2025-10-20', 4300),
+]
+
+
+def self_test() -> bool:
+    """Table-driven checks for week keying, resets, completeness and resuming from state"""
+    failures = []
+
+    def check(label, actual, expected):
+        if actual != expected:
+            failures.append(f"{label}: expected {expected!r}, got {actual!r}")
+
+    for mode, day, expected in [
+        ('ranked', '2025-10-12', '2025-10-13'),   # Sunday belongs to the week ending Monday
+        ('ranked', '2025-10-13', '2025-10-13'),   # the finals Monday itself
+        ('ranked', '2025-10-14', '2025-10-20'),   # Tuesday starts the next ranked week
+        ('calendar', '2025-10-12', '2025-10-06'),
+        ('calendar', '2025-10-13', '2025-10-13'),
+        ('calendar', '2025-10-14', '2025-10-13'),
+    ]:
+        check(f"{mode} week key for {day}", WEEK_KEY_MODES[mode](day), expected)
+
+    engine = WeeklyFinalsEngine('ranked')
+    engine.ingest(SELF_TEST_ROWS)
+    entries = engine.week_entries('2025-10-13')
+    for tag, field, expected in [
+        ('#A', 'max_trophies', 5000),
+        ('#A', 'final_trophies', 4950),
+        ('#A', 'final_day', '2025-10-12'),
+        ('#A', 'last_day', '2025-10-13'),
+        ('#B', 'final_trophies', 4900),
+    ]:
+        check(f"reset week {tag} {field}", entries[tag][field], expected)
+    check("reset week tie-break", [e['player_tag'] for e in engine.leaderboard('2025-10-13')], ['#A', '#B'])
+
+    for mode, rows, week, expected in [
+        ('ranked', SELF_TEST_ROWS[:6], '2025-10-13', False),   # finals Monday ingested, nothing after
+        ('ranked', SELF_TEST_ROWS[:7], '2025-10-13', True),
+        ('ranked', SELF_TEST_ROWS, '2025-10-20', False),
+        ('calendar', SELF_TEST_ROWS[:8], '2025-10-13', False),
+        ('calendar', SELF_TEST_ROWS, '2025-10-13', True),
+    ]:
+        partial = WeeklyFinalsEngine(mode)
+        partial.ingest(rows)
+        check(f"{mode} is_complete({week}) through {partial.last_day}", partial.is_complete(week), expected)
+
+    for mode in WEEK_KEY_MODES:
+        full = WeeklyFinalsEngine(mode)
+        full.ingest(SELF_TEST_ROWS)
+        for split in range(1, len(SELF_TEST_ROWS)):
+            # Stop after some day, round-trip the state through JSON, then add the remaining days
+            through = SELF_TEST_ROWS[split - 1]['snapshot_day']
+            _, saved, _, _ = resume(None, [r for r in SELF_TEST_ROWS if r['snapshot_day'] <= through], mode)
+            resumed, _, _, _ = resume(json.loads(json.dumps(saved)), SELF_TEST_ROWS, mode)
+            check(f"{mode} resume after {through}", resumed.to_dict(), full.to_dict())
+
+    # A rerun later the same day rewrites that day's row; the new value must replace the old one
+    first_run = SELF_TEST_ROWS[:7]
+    rerun = SELF_TEST_ROWS[:6] + [_row('#A', '2025-10-14', 4150), _row('#B', '2025-10-14', 3900)]
+    _, saved, _, _ = resume(None, first_run, 'ranked')
+    resumed, _, _, rewritten = resume(json.loads(json.dumps(saved)), rerun, 'ranked')
+    full = WeeklyFinalsEngine('ranked')
+    full.ingest(rerun)
+    check("same-day rerun matches full recompute", resumed.to_dict(), full.to_dict())
+    check("same-day rerun rewritten rows", rewritten, 1)
+
+    if failures:
+        print(f"❌ {len(failures)} self-test check(s) failed:")
+        for failure in failures:
+            print(f"  - {failure}")
+        return False
+
+    print("✅ Week keying, reset, completeness and resume checks passed")
+    return True
+
+
+def row_day(row: Dict[str, Any]) -> str:
+    return (row.get('snapshot_day') or row.get('date'))[:10]
+
+
+def rows_after(rows: List[Dict[str, Any]], last_day: str) -> List[Dict[str, Any]]:
+    """Rows strictly newer than the last day already settled into saved state"""
+    if not last_day:
+        return rows
+    return [r for r in rows if row_day(r) > last_day]
+
+
+def resume(state: Optional[Dict[str, Any]], rows: List[Dict[str, Any]], mode: str) -> Tuple['WeeklyFinalsEngine', Dict[str, Any], int, int]:
+    """Apply rows on top of saved state; return (engine, state to save, new rows, rewritten rows)
+
+    The daily pipeline runs at 4:30 and 5:30 UTC and can rewrite today's player_day
+    row, so the latest day is never settled: its rows are saved alongside the state
+    and replaced by whatever the next run reads for that day.
+    """
+    engine = WeeklyFinalsEngine.from_dict(state) if state else WeeklyFinalsEngine(mode)
+    if engine.mode != mode:
+        raise ValueError(f"State file was built in '{engine.mode}' mode, not '{mode}'")
+
+    pending = {(r['player_tag'], row_day(r)): r for r in (state or {}).get('open_rows', [])}
+    new_rows = rewritten = 0
+    for row in rows_after(rows, engine.last_day):
+        key = (row['player_tag'], row_day(row))
+        previous = pending.get(key)
+        if previous is None:
+            new_rows += 1
+        elif previous.get('trophies') != row.get('trophies'):
+            rewritten += 1
+        pending[key] = row
+
+    ordered = sorted(pending.values(), key=row_day)
+    open_day = row_day(ordered[-1]) if ordered else None
+    open_rows = [r for r in ordered if row_day(r) == open_day]
+
+    engine.ingest(r for r in ordered if row_day(r) != open_day)
+    saved = json.loads(json.dumps({**engine.to_dict(), 'open_rows': open_rows}))
+    engine.ingest(open_rows)
+    return engine, saved, new_rows, rewritten
+
+
+def load_rows(path: str) -> List[Dict[str, Any]]:
+    """Load player-day rows (trophies.json / player_day export) ordered by day"""
+    with open(path, 'r', encoding='utf-8') as f:
+        rows = json.load(f)
+    return sorted(rows, key=row_day)
+
+
+def main():
+    """Ingest rows (optionally on top of saved state) and print weekly leaderboards"""
+    parser = argparse.ArgumentParser(description="Incremental weekly ranked finals")
+    parser.add_argument('rows', nargs='?', default='trophies.json', help="Player-day rows JSON")
+    parser.add_argument('--mode', choices=list(WEEK_KEY_MODES), default='ranked', help="Week boundary rule")
+    parser.add_argument('--state', help="State file to resume from and update (only new days and the latest day are ingested)")
+    parser.add_argument('--validate', action='store_true', help="Check calendar-mode output against the JS logic")
+    parser.add_argument('--self-test', action='store_true', help="Run the built-in table-driven checks and exit")
+    args = parser.parse_args()
+
+    if args.self_test:
+        sys.exit(0 if self_test() else 1)
+
+    rows = load_rows(args.rows)
+
+    if args.validate:
+        sys.exit(0 if validate_against_js(args.rows, rows) else 1)
+
+    state = None
+    if args.state:
+        try:
+            with open(args.state, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+        except FileNotFoundError:
+            pass
+
+    try:
+        engine, saved, new_rows, rewritten = resume(state, rows, args.mode)
+    except ValueError as e:
+        print(f"💥 {e}")
+        sys.exit(1)
+
+    print(f"Ingested {new_rows} new row(s) in {engine.mode} mode; data through {engine.last_day}")
+    if rewritten:
+        print(f"↻ {rewritten} row(s) for {engine.last_day} changed since the last run and replaced the earlier values")
+
+    for week in engine.weeks():
+        status = "final" if engine.is_complete(week) else "in progress"
+        print(f"\n=== Week {week} ({status}) ===")
+        for entry in engine.leaderboard(week):
+            print(
+                f"{entry['rank']:>3}. {entry['player_name'] or entry['player_tag']:<16} "
+                f"max {entry['max_trophies']:>4} ({entry['max_day']})  final {entry['final_trophies']:>4} ({entry.get('final_day', entry['last_day'])})"
+            )
+
+    if args.state:
+        with open(args.state, 'w', encoding='utf-8') as f:
+            json.dump(saved, f, indent=2)
+        print(f"\n📄 State saved to {args.state}")
+
+
+if __name__ == "__main__":
+    main()